@@ -8,13 +8,28 @@ No external dependencies required - uses only Python's built-in tkinter.
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import os
-import configparser
+import sys
 import subprocess
 import shutil
+import stat
 from pathlib import Path
-import json
-import uuid
+from operator import itemgetter
+import secrets
 import time
+import threading
+
+# Characters allowed in profile names besides letters and digits
+_NAME_STRIP_TABLE = str.maketrans('', '', ' -_')
+
+# Firefox's spelling of the lowercased [ProfileN] keys, used when writing
+_PROFILE_KEYS = {
+    'name': 'Name',
+    'isrelative': 'IsRelative',
+    'path': 'Path',
+    'default': 'Default',
+    'storeid': 'StoreID',
+    'showselector': 'ShowSelector',
+}
 
 class FirefoxProfileManager:
     def __init__(self, root):
@@ -27,9 +42,30 @@ class FirefoxProfileManager:
         self.setup_styles()
         
         # Firefox profile paths
-        self.firefox_dir = Path.home() / ".mozilla" / "firefox"
+        self.firefox_dir = self._detect_firefox_dir()
         self.profiles_ini = self.firefox_dir / "profiles.ini"
         
+        # Parsed profiles.ini, re-read only when the file's mtime changes.
+        # Section order and the lines of non-profile sections are kept as-is.
+        self._profiles = None
+        self._profiles_by_section = {}
+        self._ini_sections = []
+        self._other_sections = {}
+        
+        # Profile sections read without a Name key; their seeded empty
+        # name is not written back
+        self._unnamed_sections = set()
+        self._ini_mtime = 0
+        
+        # mtime of the profiles.ini state the treeview currently shows
+        self._tree_mtime = None
+        
+        # Bumped on every load so stale creation-date workers are ignored
+        self._load_generation = 0
+        
+        # Highest N among [ProfileN] sections, so new sections never collide
+        self._max_profile_num = -1
+        
         # Create main interface
         self.create_widgets()
         self.load_profiles()
@@ -37,6 +73,29 @@ class FirefoxProfileManager:
         # Center window on screen
         self.center_window()
     
+    def _detect_firefox_dir(self):
+        """Locate the Firefox data directory for the current platform"""
+        home = Path.home()
+        
+        if sys.platform.startswith('win'):
+            appdata = os.environ.get('APPDATA')
+            base = Path(appdata) if appdata else home / "AppData" / "Roaming"
+            return base / "Mozilla" / "Firefox"
+        
+        if sys.platform == 'darwin':
+            return home / "Library" / "Application Support" / "Firefox"
+        
+        # Linux: classic install first, then Snap and Flatpak packages
+        candidates = (
+            home / ".mozilla" / "firefox",
+            home / "snap" / "firefox" / "common" / ".mozilla" / "firefox",
+            home / ".var" / "app" / "org.mozilla.firefox" / ".mozilla" / "firefox",
+        )
+        for candidate in candidates:
+            if (candidate / "profiles.ini").exists():
+                return candidate
+        return candidates[0]
+    
     def setup_styles(self):
         """Configure modern styling for the application"""
         style = ttk.Style()
@@ -140,8 +199,10 @@ class FirefoxProfileManager:
         list_frame.pack(fill=tk.BOTH, expand=True)
         
         # Treeview for profiles
-        columns = ('Name', 'Path', 'Default', 'Created')
-        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12)
+        # IniPath and IsRelative hold the raw profiles.ini values and are hidden
+        columns = ('Name', 'Path', 'Default', 'Created', 'IniPath', 'IsRelative')
+        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=12,
+                                 displaycolumns=('Name', 'Path', 'Default', 'Created'))
         
         # Configure columns
         self.tree.heading('Name', text='Profile Name')
@@ -184,49 +245,36 @@ class FirefoxProfileManager:
     def load_profiles(self):
         """Load Firefox profiles from profiles.ini"""
         try:
-            # Clear existing items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
+            # Clear existing items in a single call
+            children = self.tree.get_children()
+            if children:
+                self.tree.delete(*children)
+            self._tree_mtime = None
             
-            if not self.profiles_ini.exists():
+            # Invalidate creation-date results for the rows just removed
+            self._load_generation += 1
+            
+            # Parse profiles.ini and sort by name
+            profiles = sorted(self._get_profiles(), key=itemgetter('name'))
+            
+            if not self._ini_mtime:
+                self._tree_mtime = self._ini_mtime
                 self.status_var.set("No Firefox profiles found")
                 return
             
-            # Parse profiles.ini
-            config = configparser.ConfigParser()
-            config.read(self.profiles_ini)
-            
-            profiles = []
-            for section in config.sections():
-                if section.startswith('Profile'):
-                    profile_data = dict(config[section])
-                    profile_data['section'] = section
-                    profiles.append(profile_data)
+            # Build row values before touching the treeview
+            rows = [self._profile_row(profile) for profile in profiles]
             
-            # Sort profiles by name
-            profiles.sort(key=lambda x: x.get('Name', ''))
+            # Add profiles to treeview, keyed by section
+            items = []
+            for profile, (values, profile_path) in zip(profiles, rows):
+                section = profile['section']
+                self.tree.insert('', 'end', iid=section, values=values)
+                items.append((section, profile_path, values[4]))
+            self._tree_mtime = self._ini_mtime
             
-            # Add profiles to treeview
-            for profile in profiles:
-                name = profile.get('name', 'Unknown')
-                path = profile.get('path', 'Unknown')
-                is_relative = profile.get('isrelative', '1') == '1'
-                is_default = profile.get('default', '0') == '1'
-                default_text = '✓' if is_default else ''
-                
-                # Handle relative vs absolute paths
-                if is_relative:
-                    profile_path = self.firefox_dir / path
-                else:
-                    profile_path = Path(path)
-                
-                # Get creation date
-                created = self.get_profile_creation_date(profile_path)
-                
-                # Display the actual profile directory name
-                display_path = str(profile_path.name) if profile_path.exists() else path
-                
-                self.tree.insert('', 'end', values=(name, display_path, default_text, created))
+            # Resolve creation dates off the GUI thread
+            self._start_date_worker(items)
             
             self.status_var.set(f"Loaded {len(profiles)} profile(s)")
             
@@ -234,16 +282,206 @@ class FirefoxProfileManager:
             messagebox.showerror("Error", f"Failed to load profiles: {str(e)}")
             self.status_var.set("Error loading profiles")
     
+    def _profile_row(self, profile):
+        """Build the treeview values for a profile, plus its directory path"""
+        name = profile['name'] or 'Unknown'
+        path = profile.get('path', 'Unknown')
+        is_relative = profile.get('isrelative', '1') == '1'
+        is_default = profile.get('default', '0') == '1'
+        default_text = '✓' if is_default else ''
+        
+        # Handle relative vs absolute paths
+        if is_relative:
+            profile_path = self.firefox_dir / path
+        else:
+            profile_path = Path(path)
+        
+        # Display the actual profile directory name; the creation
+        # date is filled in later by a background worker
+        values = (name, profile_path.name, default_text, '…', path,
+                  '1' if is_relative else '0')
+        return values, profile_path
+    
+    def _sorted_index(self, profile):
+        """Position of a profile among the name-sorted treeview rows"""
+        return sum(1 for other in self._profiles
+                   if other is not profile and other['name'] <= profile['name'])
+    
+    def _tree_in_sync(self):
+        """Whether the treeview still mirrors the cached profiles.ini state"""
+        return self._tree_mtime is not None and self._tree_mtime == self._ini_mtime
+    
+    def _tree_add(self, profile):
+        """Insert a single profile row at its sorted position"""
+        values, profile_path = self._profile_row(profile)
+        section = profile['section']
+        self.tree.insert('', self._sorted_index(profile), iid=section, values=values)
+        self._start_date_worker([(section, profile_path, values[4])])
+    
+    def _tree_update_row(self, section, column, value):
+        """Update one cell of a profile row, keeping rows sorted by name"""
+        self.tree.set(section, column, value)
+        if column == 'Name':
+            profile = self._profiles_by_section[section]
+            self.tree.move(section, '', self._sorted_index(profile))
+    
+    def _tree_remove(self, section):
+        """Remove a single profile row"""
+        if self.tree.exists(section):
+            self.tree.delete(section)
+    
+    def _start_date_worker(self, items):
+        """Resolve creation dates for (iid, profile_path, path) items off the GUI thread"""
+        threading.Thread(target=self._fill_dates,
+                         args=(self._load_generation, items),
+                         daemon=True).start()
+    
+    def _fill_dates(self, generation, items):
+        """Stat each profile directory and post the results to the GUI thread"""
+        for iid, profile_path, path in items:
+            if generation != self._load_generation:
+                return
+            
+            created, exists = self.get_profile_creation_date(profile_path)
+            self.root.after(0, self._set_profile_date, generation, iid, created,
+                            None if exists else path)
+    
+    def _set_profile_date(self, generation, iid, created, missing_path):
+        """Update a row with its creation date (runs on the GUI thread)"""
+        if generation != self._load_generation or not self.tree.exists(iid):
+            return
+        
+        self.tree.set(iid, 'Created', created)
+        if missing_path is not None:
+            # Profile directory is gone, show the raw path from profiles.ini
+            self.tree.set(iid, 'Path', missing_path)
+    
+    def _scan_ini(self):
+        """Parse profiles.ini in a single pass.
+        
+        Returns (profiles, sections, others): profile dicts with lowercased
+        keys, every section name in file order, and the lines of each
+        non-profile section to be written back as-is.
+        """
+        profiles = []
+        sections = []
+        others = {}
+        current = None
+        lines = None
+        for line in self.profiles_ini.read_text(encoding='utf-8').splitlines():
+            line = line.strip()
+            if not line or line[0] in '#;':
+                continue
+            
+            if line[0] == '[':
+                section = line[1:-1].strip()
+                sections.append(section)
+                if section.startswith('Profile'):
+                    current = {'section': section}
+                    lines = None
+                    profiles.append(current)
+                else:
+                    current = None
+                    lines = others.setdefault(section, [])
+            elif current is not None and '=' in line:
+                key, _, value = line.partition('=')
+                current[key.strip().lower()] = value.strip()
+            elif lines is not None:
+                lines.append(line)
+        
+        return profiles, sections, others
+    
+    def _get_profiles(self):
+        """Return the parsed profiles, re-reading profiles.ini only if it changed on disk"""
+        try:
+            mtime = self.profiles_ini.stat().st_mtime
+        except FileNotFoundError:
+            mtime = 0
+        
+        if self._profiles is None or mtime != self._ini_mtime:
+            if mtime:
+                self._profiles, self._ini_sections, self._other_sections = self._scan_ini()
+            else:
+                self._profiles, self._ini_sections, self._other_sections = [], [], {}
+            self._profiles_by_section = {p['section']: p for p in self._profiles}
+            self._ini_mtime = mtime
+            
+            # Every profile gets a name so it can be sorted by itemgetter
+            self._unnamed_sections = set()
+            for profile in self._profiles:
+                if 'name' not in profile:
+                    profile['name'] = ''
+                    self._unnamed_sections.add(profile['section'])
+            self._update_max_profile_num()
+        
+        return self._profiles
+    
+    def _update_max_profile_num(self):
+        """Recompute the highest N among the cached [ProfileN] sections"""
+        self._max_profile_num = max(
+            (int(section[7:]) for section in self._profiles_by_section
+             if section[7:].isdigit()),
+            default=-1)
+    
+    def _write_ini(self):
+        """Render the cached state as profiles.ini and write it in one call"""
+        blocks = []
+        for section in self._ini_sections:
+            block = f"[{section}]\n"
+            profile = self._profiles_by_section.get(section)
+            if profile is None:
+                block += ''.join(f"{line}\n" for line in self._other_sections.get(section, ()))
+            else:
+                for key, value in profile.items():
+                    if key == 'section':
+                        continue
+                    if key == 'name' and not value and section in self._unnamed_sections:
+                        continue
+                    block += f"{_PROFILE_KEYS.get(key, key)}={value}\n"
+            blocks.append(block)
+        
+        in_sync = self._tree_in_sync()
+        try:
+            self._save('\n'.join(blocks))
+        except Exception:
+            # The cache already holds the failed change; force a re-read
+            self._profiles = None
+            raise
+        if in_sync:
+            self._tree_mtime = self._ini_mtime
+    
+    def _save(self, text):
+        """Atomically replace profiles.ini with the given text"""
+        # Replace the real file so a symlinked profiles.ini stays a symlink
+        target = self.profiles_ini.resolve()
+        tmp = target.with_suffix('.ini.tmp')
+        try:
+            tmp.write_text(text, encoding='utf-8')
+            # The rename keeps the inode's mtime, so take it from the temp file;
+            # a stat after the replace could pick up a concurrent Firefox write
+            mtime = tmp.stat().st_mtime
+            os.replace(tmp, target)
+        except Exception:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+            raise
+        self._ini_mtime = mtime
+    
     def get_profile_creation_date(self, profile_path):
-        """Get the creation date of a profile directory"""
+        """Get the creation date of a profile directory.
+        
+        Returns a (created, exists) tuple from a single stat call.
+        """
         try:
-            if profile_path.exists() and profile_path.is_dir():
-                stat = profile_path.stat()
-                return time.strftime('%Y-%m-%d', time.localtime(stat.st_ctime))
-            return 'Unknown'
-        except Exception as e:
-            print(f"Error getting creation date for {profile_path}: {e}")
-            return 'Unknown'
+            st = os.stat(profile_path)
+        except OSError:
+            return 'Unknown', False
+        
+        if stat.S_ISDIR(st.st_mode):
+            return time.strftime('%Y-%m-%d', time.localtime(st.st_ctime)), True
+        return 'Unknown', True
     
     def on_profile_select(self, event):
         """Handle profile selection"""
@@ -254,14 +492,72 @@ class FirefoxProfileManager:
             self.status_var.set("Ready")
     
     def get_selected_profile(self):
-        """Get the currently selected profile"""
+        """Get the currently selected profile.
+        
+        Returns the row's column values followed by its profiles.ini section,
+        which is also the row's item id.
+        """
         selection = self.tree.selection()
         if not selection:
             messagebox.showwarning("No Selection", "Please select a profile first.")
             return None
         
-        item = self.tree.item(selection[0])
-        return item['values']
+        # Read cells as strings; item()['values'] would turn numeric names into ints
+        iid = selection[0]
+        values = [str(self.tree.set(iid, column)) for column in self.tree['columns']]
+        return values + [iid]
+    
+    def _verify_selected(self, section, name, ini_path):
+        """Return the cached profile behind a selected row, or None if it is stale.
+        
+        Firefox renumbers [ProfileN] sections when it rewrites profiles.ini,
+        so the row's section is only trusted while the tree still mirrors the
+        file and the profile stored under it has the row's name and path.
+        Otherwise the list is reloaded.
+        """
+        self._get_profiles()
+        changed = ("profiles.ini was changed outside this window. "
+                   "The list has been reloaded, please try again.")
+        
+        if not self._tree_in_sync():
+            message = changed
+        else:
+            profile = self._profiles_by_section.get(section)
+            if profile is None:
+                message = f"Profile '{name}' no longer exists."
+            else:
+                values, _ = self._profile_row(profile)
+                if values[0] == name and values[4] == ini_path:
+                    return profile
+                message = changed
+        
+        messagebox.showwarning("Profile Changed", message)
+        self.load_profiles()
+        return None
+    
+    def _deletable_profile_dir(self, profile):
+        """Resolve a profile's directory for removal, or None if that is unsafe.
+        
+        Refuses the Firefox directory, its parents and the home directory,
+        and keeps relative profiles strictly inside the Firefox directory.
+        """
+        path = profile.get('path')
+        if not path:
+            return None
+        
+        firefox_dir = self.firefox_dir.resolve()
+        if profile.get('isrelative', '1') == '1':
+            profile_dir = (firefox_dir / path).resolve()
+            if firefox_dir not in profile_dir.parents:
+                return None
+        else:
+            profile_dir = Path(path).resolve()
+        
+        home = Path.home().resolve()
+        protected = {firefox_dir, home, *firefox_dir.parents, *home.parents}
+        if profile_dir in protected:
+            return None
+        return profile_dir
     
     def create_profile(self):
         """Create a new Firefox profile"""
@@ -271,13 +567,13 @@ class FirefoxProfileManager:
             return
         
         # Validate name
-        if not name.replace(' ', '').replace('-', '').replace('_', '').isalnum():
+        if not name.translate(_NAME_STRIP_TABLE).isalnum():
             messagebox.showerror("Invalid Name", "Profile name can only contain letters, numbers, spaces, hyphens, and underscores.")
             return
         
         try:
             # Generate unique profile ID
-            profile_id = ''.join([str(uuid.uuid4()).replace('-', '')[:8] for _ in range(2)])
+            profile_id = secrets.token_hex(8)
             profile_path = f"{profile_id}.{name.lower().replace(' ', '-')}"
             
             # Create profile directory
@@ -288,10 +584,13 @@ class FirefoxProfileManager:
             self.create_profile_files(full_path, name)
             
             # Update profiles.ini
-            self.add_profile_to_ini(name, profile_path)
+            profile = self.add_profile_to_ini(name, profile_path)
             
-            # Refresh the list
-            self.load_profiles()
+            # Add the new row, or reload if profiles.ini changed under us
+            if self._tree_in_sync():
+                self._tree_add(profile)
+            else:
+                self.load_profiles()
             
             messagebox.showinfo("Success", f"Profile '{name}' created successfully!")
             self.status_var.set(f"Created profile: {name}")
@@ -303,10 +602,12 @@ class FirefoxProfileManager:
         """Create basic files for a new profile"""
         # Create prefs.js
         prefs_js = profile_path / "prefs.js"
-        with open(prefs_js, 'w') as f:
-            f.write(f'// Firefox Profile: {name}\n')
-            f.write('user_pref("browser.startup.page", 1);\n')
-            f.write('user_pref("browser.startup.homepage", "about:blank");\n')
+        prefs_js.write_text(
+            f'// Firefox Profile: {name}\n'
+            'user_pref("browser.startup.page", 1);\n'
+            'user_pref("browser.startup.homepage", "about:blank");\n',
+            encoding='utf-8'
+        )
         
         # Create user.js (empty)
         user_js = profile_path / "user.js"
@@ -314,40 +615,31 @@ class FirefoxProfileManager:
         
         # Create times.json
         times_json = profile_path / "times.json"
-        with open(times_json, 'w') as f:
-            json.dump({
-                "created": int(time.time() * 1000000),
-                "reset": int(time.time() * 1000000)
-            }, f)
+        timestamp = int(time.time() * 1000000)
+        times_json.write_text(f'{{"created": {timestamp}, "reset": {timestamp}}}',
+                              encoding='utf-8')
     
     def add_profile_to_ini(self, name, path):
-        """Add a new profile to profiles.ini"""
-        config = configparser.ConfigParser()
-        config.read(self.profiles_ini)
-        
-        # Find next profile number
-        profile_numbers = []
-        for section in config.sections():
-            if section.startswith('Profile'):
-                try:
-                    num = int(section.replace('Profile', ''))
-                    profile_numbers.append(num)
-                except ValueError:
-                    pass
-        
-        next_num = max(profile_numbers) + 1 if profile_numbers else 0
+        """Add a new profile to profiles.ini and return its profile dict"""
+        profiles = self._get_profiles()
+        
+        # Allocate the next profile number
+        self._max_profile_num += 1
         
         # Add new profile
-        section_name = f"Profile{next_num}"
-        config[section_name] = {
-            'Name': name,
-            'IsRelative': '1',
-            'Path': path
+        profile = {
+            'section': f"Profile{self._max_profile_num}",
+            'name': name,
+            'isrelative': '1',
+            'path': path
         }
+        profiles.append(profile)
+        self._profiles_by_section[profile['section']] = profile
+        self._ini_sections.append(profile['section'])
         
         # Write back to file
-        with open(self.profiles_ini, 'w') as f:
-            config.write(f)
+        self._write_ini()
+        return profile
     
     def launch_profile(self):
         """Launch Firefox with the selected profile"""
@@ -355,7 +647,7 @@ class FirefoxProfileManager:
         if not profile_data:
             return
         
-        name, path, _, _ = profile_data
+        name = profile_data[0]
         
         try:
             # Launch Firefox with the profile
@@ -376,7 +668,7 @@ class FirefoxProfileManager:
         if not profile_data:
             return
         
-        old_name, path, is_default, _ = profile_data
+        old_name, _, is_default, _, ini_path, _, section = profile_data
         
         if is_default:
             messagebox.showwarning("Cannot Rename", "Cannot rename the default profile.")
@@ -388,28 +680,22 @@ class FirefoxProfileManager:
             return
         
         # Validate name
-        if not new_name.replace(' ', '').replace('-', '').replace('_', '').isalnum():
+        if not new_name.translate(_NAME_STRIP_TABLE).isalnum():
             messagebox.showerror("Invalid Name", "Profile name can only contain letters, numbers, spaces, hyphens, and underscores.")
             return
         
         try:
-            # Update profiles.ini
-            config = configparser.ConfigParser()
-            config.read(self.profiles_ini)
-            
-            # Find and update the profile
-            for section in config.sections():
-                if section.startswith('Profile'):
-                    if config[section].get('Name') == old_name:
-                        config[section]['Name'] = new_name
-                        break
+            # Update the profile's section, if it is still the selected profile
+            profile = self._verify_selected(section, old_name, ini_path)
+            if profile is None:
+                return
+            profile['name'] = new_name
             
             # Write back to file
-            with open(self.profiles_ini, 'w') as f:
-                config.write(f)
+            self._write_ini()
             
-            # Refresh the list
-            self.load_profiles()
+            # Update the row
+            self._tree_update_row(section, 'Name', new_name)
             
             messagebox.showinfo("Success", f"Profile renamed from '{old_name}' to '{new_name}'")
             self.status_var.set(f"Renamed profile: {old_name} → {new_name}")
@@ -423,7 +709,7 @@ class FirefoxProfileManager:
         if not profile_data:
             return
         
-        name, path, is_default, _ = profile_data
+        name, _, is_default, _, ini_path, _, section = profile_data
         
         if is_default:
             messagebox.showwarning("Cannot Delete", "Cannot delete the default profile.")
@@ -438,32 +724,32 @@ class FirefoxProfileManager:
             return
         
         try:
-            # Remove from profiles.ini
-            config = configparser.ConfigParser()
-            config.read(self.profiles_ini)
-            
-            # Find and remove the profile section
-            section_to_remove = None
-            for section in config.sections():
-                if section.startswith('Profile'):
-                    if config[section].get('Name') == name:
-                        section_to_remove = section
-                        break
+            # Remove the profile's section, if it is still the selected profile
+            profile = self._verify_selected(section, name, ini_path)
+            if profile is None:
+                return
+            del self._profiles_by_section[section]
+            self._profiles.remove(profile)
+            self._ini_sections.remove(section)
             
-            if section_to_remove:
-                config.remove_section(section_to_remove)
+            # Firefox stops reading at the first missing ProfileN, so let the
+            # next profile reuse this number if it was the highest
+            self._update_max_profile_num()
             
             # Write back to file
-            with open(self.profiles_ini, 'w') as f:
-                config.write(f)
+            self._write_ini()
             
-            # Remove profile directory
-            profile_path = self.firefox_dir / path
-            if profile_path.exists():
+            # Remove profile directory, resolved from the raw profiles.ini path
+            profile_path = self._deletable_profile_dir(profile)
+            if profile_path is None:
+                messagebox.showwarning("Profile Data Kept",
+                                       f"The directory of profile '{name}' was not removed "
+                                       "because its path in profiles.ini is missing or unsafe.")
+            elif profile_path.exists():
                 shutil.rmtree(profile_path)
             
-            # Refresh the list
-            self.load_profiles()
+            # Drop the row
+            self._tree_remove(section)
             
             messagebox.showinfo("Success", f"Profile '{name}' deleted successfully")
             self.status_var.set(f"Deleted profile: {name}")